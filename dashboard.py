@@ -2,12 +2,10 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-import matplotlib.colors as mcolors
 import plotly.express as px
 from sklearn.decomposition import PCA
-import seaborn as sns
 import functions.helpers as helpers
+import functions.plots as plots
 
 # Set the page configuration
 st.set_page_config(initial_sidebar_state="collapsed", page_title='Cardiotocography Dashboard', page_icon='🩺')
@@ -24,23 +22,30 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-def desaturate_color(color, amount=0.5):
+@st.cache_data(max_entries=1)
+def compute_pca(version, _featured_df):
     """
-    Desaturate a given color by blending it with white.
-    
-    Parameters:
-    color: str or tuple - Original color in any format recognized by matplotlib.
-    amount: float - Amount to desaturate (0.0 is no change, 1.0 is white).
-    
-    Returns:
-    tuple - Desaturated color as an RGB tuple.
+    Explained variance per feature, sorted descending.
+    Cached per version of the data, so a new version of the dataset invalidates it.
     """
-    rgb = mcolors.to_rgb(color)
-    white = np.array([1, 1, 1])
-    desaturated_rgb = (1 - amount) * np.array(rgb) + amount * white
-    return tuple(desaturated_rgb)
+    X = _featured_df
+    pca = PCA(n_components=len(X.columns))
+    X_pca = pca.fit_transform(X)
 
-def main(featured_df, target_df):
+    # Sorting the explained variance ratios and corresponding feature names
+    explained_variances = pca.explained_variance_ratio_
+    features = X.columns
+    indices = np.argsort(explained_variances)[::-1]  # Get the indices that would sort the array
+    return features[indices], explained_variances[indices]
+
+
+@st.cache_data(max_entries=1)
+def compute_correlation(version, _featured_df):
+    """Correlation matrix of all features, cached per version of the data."""
+    return _featured_df.corr().round(2)
+
+
+def main(featured_df, target_df, version):
 
     st.title('Cardiotocography Dashboard')
 
@@ -93,16 +98,7 @@ def main(featured_df, target_df):
     st.markdown('Principal Component Analysis (PCA) is a mathematical reduction technique that allows to illuminate the most important measurements in the big datasets. The graph below shows the explained variance for each measurement of a patient. The higher the explained variance, the more important that measurement could be for further treatment.')
 
     # Perform PCA
-    X = featured_df
-    pca = PCA(n_components=len(X.columns))
-    X_pca = pca.fit_transform(X)
-
-    # Sorting the explained variance ratios and corresponding feature names
-    explained_variances = pca.explained_variance_ratio_
-    features = X.columns
-    indices = np.argsort(explained_variances)[::-1]  # Get the indices that would sort the array
-    sorted_variances = explained_variances[indices]
-    sorted_features = features[indices]
+    sorted_features, sorted_variances = compute_pca(version, featured_df)
 
     # Create bar plot for the sorted explained variances
     fig, ax = plt.subplots()
@@ -232,20 +228,6 @@ def main(featured_df, target_df):
     elif not show_all_features_overview:
         selected_features_overview = st.multiselect("Choose features:", all_features, default=all_features[:5])
 
-    # Intermittent red lines for normal reference values
-    red_lines = {
-        'LB': [110, 150],
-        'AC': [0, 0.013],
-        'UC': [0, 0.0083],
-        'DL': [0.00167, 0],
-        'ASTV': [20, 58],
-        'MSTV': [0.5, 2.5],
-        'ALTV': [0, 13],
-        'MLTV': [4, 17],
-        'Width': [25, 140],
-
-    }
-
     st.markdown("""**💡 How to use this overview?**""")
     st.markdown("""This overview displays the distribution of selected measurements in the dataset and should give you an idea of the range and spread of the data.
                 In some cases, normal reference values are indicated by intermittent red lines. These values can help you interpret the data in the context of typical measurements.""")
@@ -264,37 +246,16 @@ def main(featured_df, target_df):
                         ax.get_xticklabels() + ax.get_yticklabels()):
                 item.set_fontsize(18)
 
-        handles_dict = {
-            'Normal': Rectangle((0, 0), 2, 1, color=desaturate_color('green', 0.5)),
-            'Suspect': Rectangle((0, 0), 2, 1, color=desaturate_color('blue', 0.5)),
-            'Pathologic': Rectangle((0, 0), 2, 1, color=desaturate_color('red', 0.5)),
-            'Normal reference value': plt.Line2D([0], [0], color='red', linestyle='--', linewidth=1)
-        }
-
         for i, column in enumerate(featured_df[selected_features_overview].columns):
             if n_rows == 1:
                 ax = axes[i % n_cols]
             else:
                 ax = axes[i // n_cols, i % n_cols]
             description = next((desc for desc in categorical_variables if desc.startswith(column)), column)
-            sns.kdeplot(data=featured_df, x=column, hue=target_df['NSP_Label'], fill=True,
-                        palette={'Normal': 'green', 'Suspect': 'blue', 'Pathologic': 'red'}, ax=ax)
+            plots.plot_distribution(featured_df, target_df, column, ax, description)
 
-            # Add intermittent red lines
-            if column in red_lines:
-                for line in red_lines[column]:
-                    ax.axvline(line, color='red', linestyle='--', linewidth=1, label='Normal reference value')
-            
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.set_title(f'Distribution of {description}', fontsize=18, fontweight='bold')
-            
-            
             # Prepare the ordered handles and labels for the legend
-            labels_order = ['Normal', 'Suspect', 'Pathologic', 'Normal reference value']
-            handles = [handles_dict[label] for label in labels_order]
-
-            ax.get_legend().remove()
+            labels_order, handles = plots.legend_handles()
 
                     # Add legend outside of the subplots
             if n_rows == 1:
@@ -314,31 +275,10 @@ def main(featured_df, target_df):
 
         for column in selected_features_overview:
             description = next((desc for desc in categorical_variables if desc.startswith(column)), column)
-            sns.kdeplot(data=featured_df, x=column, hue=target_df['NSP_Label'], fill=True,
-                        palette={'Normal': 'green', 'Suspect': 'blue', 'Pathologic': 'red'}, ax=ax)
-
-            # Add intermittent red lines
-            if column in red_lines:
-                for line in red_lines[column]:
-                    ax.axvline(line, color='red', linestyle='--', linewidth=1)
-
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.set_title(f'Distribution of {description}', fontsize=18, fontweight='bold')
-
-            # add line for normal reference values to the legend
-            handles_dict = {
-                'Normal': Rectangle((0, 0), 2, 1, color=desaturate_color('green', 0.5)),
-                'Suspect': Rectangle((0, 0), 2, 1, color=desaturate_color('blue', 0.5)),
-                'Pathologic': Rectangle((0, 0), 2, 1, color=desaturate_color('red', 0.5)),
-                'Normal reference value': plt.Line2D([0], [0], color='red', linestyle='--', linewidth=1)
-            }
+            plots.plot_distribution(featured_df, target_df, column, ax, description)
 
             # Prepare the ordered handles and labels for the legend
-            labels_order = ['Normal', 'Suspect', 'Pathologic', 'Normal reference value']
-            handles = [handles_dict[label] for label in labels_order]
-
-            ax.get_legend().remove()
+            labels_order, handles = plots.legend_handles()
 
             # Add legend inside the plot
             fig.legend(handles=handles, labels=labels_order, loc='upper right', bbox_to_anchor=(0.9, 0.8), fontsize=11, title='NSP Label', title_fontsize='13')
@@ -377,8 +317,7 @@ def main(featured_df, target_df):
             Look for strong positive or negative correlations, as they may indicate significant information. 
             1 means positive correlation, -1 represents negative correlation, 0 indicates no correlation.
                 """)
-            corr_matrix = featured_df[selected_features_corr].corr()
-            corr_matrix = corr_matrix.round(2)
+            corr_matrix = compute_correlation(version, featured_df).loc[selected_features_corr, selected_features_corr]
             heatmap_fig = px.imshow(corr_matrix, text_auto=True, labels=dict(x="Feature", y="Feature", color="Correlation"), aspect="auto", color_continuous_scale='RdBu_r', zmin=-1, zmax=1)
             st.plotly_chart(heatmap_fig, use_container_width=True)
             
@@ -390,5 +329,5 @@ def main(featured_df, target_df):
     st.link_button('Try your own data', '/tryout')
 
 if __name__ == '__main__':
-    featured_df, target_df = helpers.loaddata()
-    main(featured_df, target_df)
+    featured_df, target_df, version = helpers.loaddata()
+    main(featured_df, target_df, version)
@@ -1,32 +1,89 @@
-import os
+import io
+import ssl
 import json
+import time
+import urllib.request
+import certifi
 import pandas as pd
-from ucimlrepo import fetch_ucirepo 
+import functions.refresh as refresh
 
 pd.options.mode.chained_assignment = None  # Suppress the warning
 
-def loaddata():
-    """Load the Cardiotocography dataset from the UCI repository."""
+# Seconds between two revalidations of the UCI repository and seconds to wait for it
+REFRESH_INTERVAL = 60 * 60
+FETCH_TIMEOUT = 60
 
-    data_dir = 'data'
-    os.makedirs(data_dir, exist_ok=True)
+# Metadata of the Cardiotocography dataset, with the url of its csv file
+UCI_API_URL = 'https://archive.ics.uci.edu/api/dataset?id=193'
 
-    try:
-        cardiotocography = fetch_ucirepo(id=193) 
 
-        featured_df = cardiotocography.data.features  # Get the original DataFrames
-        target_df = cardiotocography.data.targets
+def read_url(url, deadline):
+    """
+    Download url. Every socket operation times out after FETCH_TIMEOUT seconds
+    and the whole download is stopped at the deadline, so a slow server can not block it forever.
+    """
+    context = ssl.create_default_context(cafile=certifi.where())
+    chunks = []
+
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT, context=context) as response:
+        while True:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Download of {url} took longer than {FETCH_TIMEOUT}s')
+            # read1 returns what has arrived, so the deadline is checked while a slow server sends data
+            chunk = response.read1(64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
 
-        featured_df.to_csv('data/featured_df.csv', index=False)
-        target_df.to_csv('data/target_df.csv', index=False)
+    return b''.join(chunks)
 
-    except:
-        featured_df = pd.read_csv('data/featured_df.csv')
-        target_df = pd.read_csv('data/target_df.csv')
 
+def fetch_uci():
+    """
+    Fetch the Cardiotocography dataset from the UCI repository.
+    Does the same as fetch_ucirepo(id=193), which does not take a timeout.
+    """
+    deadline = time.monotonic() + FETCH_TIMEOUT
+
+    response = json.loads(read_url(UCI_API_URL, deadline))
+    if response['status'] != 200:
+        raise ConnectionError(response.get('message', 'Dataset not found in the UCI repository'))
+    metadata = response['data']
+
+    df = pd.read_csv(io.BytesIO(read_url(metadata['data_url'], deadline)))
+
+    # Split the columns into features and targets by the role of the variables
+    features = [variable['name'] for variable in metadata['variables'] if variable['role'] == 'Feature']
+    targets = [variable['name'] for variable in metadata['variables'] if variable['role'] == 'Target']
+
+    return df[features], df[targets]
+
+
+refresher = refresh.DataRefresher(fetch_uci, data_dir='data', interval=REFRESH_INTERVAL, timeout=FETCH_TIMEOUT)
+
+
+def loaddata(background=True):
+    """
+    Load the Cardiotocography dataset from the local snapshot.
+    The UCI repository is revalidated in a background thread, a new version is served once its content changed.
+    Without background, the UCI repository is revalidated once before the data is returned.
+
+    Returns:
+    featured_df, target_df, version - The version is the content hash of the data.
+    """
+    if background:
+        refresher.start()
+    else:
+        refresher.refresh_once()
+
+    featured_df, target_df, version = refresher.get()
+
+    target_df = target_df.copy()
     target_df.loc[:, 'NSP_Label'] = target_df['NSP'].map({1: 'Normal', 2: 'Suspect', 3: 'Pathologic'})
 
-    return featured_df, target_df
+    return featured_df, target_df, version
+
+
 def save_session_data(variable, value):
     """
     Save the session data to a csv file. Dont overwrite the existing data.
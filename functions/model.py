@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+
+def train_model(featured_df, target_df):
+    # Prepare the data for model building
+    X = featured_df
+    y = target_df['NSP_Label']
+
+    # Split data into training and testing sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Initialize the Random Forest Classifier
+    clf = RandomForestClassifier(n_estimators=100, random_state=42)
+
+    # Train the model
+    clf.fit(X_train, y_train)
+
+    # Make predictions
+    y_pred = clf.predict(X_test)
+
+    # Evaluate the model
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"Model Accuracy: {accuracy}")
+
+    return clf, X.columns.tolist()
+
+
+def prepare_input(input_data_df, featured_df, feature_columns):
+    """
+    Bring the input data in the shape the model was trained on.
+    Missing features and empty values are filled with the mean of the dataset.
+    """
+    input_data_df = input_data_df.copy()
+    for col in feature_columns:
+        if col not in input_data_df.columns:
+            input_data_df[col] = featured_df[col].mean()
+        else:
+            input_data_df[col] = input_data_df[col].fillna(featured_df[col].mean())
+
+    return input_data_df[feature_columns]
+
+
+def predict_batch(clf, input_data_df):
+    """
+    Predict the NSP label and its probability for all rows at once.
+    Returns a DataFrame with the columns 'prediction' and 'probability'.
+    """
+    probabilities = clf.predict_proba(input_data_df)
+    best = np.argmax(probabilities, axis=1)
+
+    return pd.DataFrame({
+        'prediction': clf.classes_[best],
+        'probability': probabilities[np.arange(len(best)), best],
+    }, index=input_data_df.index)
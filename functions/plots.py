@@ -0,0 +1,90 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.patches import Rectangle
+import matplotlib.colors as mcolors
+import seaborn as sns
+
+# Colors for the NSP labels
+nsp_palette = {'Normal': 'green', 'Suspect': 'blue', 'Pathologic': 'red'}
+
+# Intermittent red lines for normal reference values
+red_lines = {
+    'LB': [110, 150],
+    'AC': [0, 0.013],
+    'UC': [0, 0.0083],
+    'DL': [0.00167, 0],
+    'ASTV': [20, 58],
+    'MSTV': [0.5, 2.5],
+    'ALTV': [0, 13],
+    'MLTV': [4, 17],
+    'Width': [25, 140],
+
+}
+
+
+def desaturate_color(color, amount=0.5):
+    """
+    Desaturate a given color by blending it with white.
+
+    Parameters:
+    color: str or tuple - Original color in any format recognized by matplotlib.
+    amount: float - Amount to desaturate (0.0 is no change, 1.0 is white).
+
+    Returns:
+    tuple - Desaturated color as an RGB tuple.
+    """
+    rgb = mcolors.to_rgb(color)
+    white = np.array([1, 1, 1])
+    desaturated_rgb = (1 - amount) * np.array(rgb) + amount * white
+    return tuple(desaturated_rgb)
+
+
+def legend_handles(exam_value=False):
+    """
+    Return the ordered labels and handles for the NSP legend.
+    If exam_value is set, a handle for the marked exam value is added.
+    """
+    handles_dict = {
+        'Normal': Rectangle((0, 0), 2, 1, color=desaturate_color('green', 0.5)),
+        'Suspect': Rectangle((0, 0), 2, 1, color=desaturate_color('blue', 0.5)),
+        'Pathologic': Rectangle((0, 0), 2, 1, color=desaturate_color('red', 0.5)),
+        'Normal reference value': plt.Line2D([0], [0], color='red', linestyle='--', linewidth=1)
+    }
+    labels_order = ['Normal', 'Suspect', 'Pathologic', 'Normal reference value']
+
+    if exam_value:
+        handles_dict['Exam value'] = plt.Line2D([0], [0], color='black', linewidth=2)
+        labels_order.append('Exam value')
+
+    handles = [handles_dict[label] for label in labels_order]
+    return labels_order, handles
+
+
+def plot_distribution(featured_df, target_df, column, ax, description=None):
+    """
+    Density plot of a measurement per NSP label with the normal reference values as intermittent red lines.
+    """
+    if description is None:
+        description = column
+
+    sns.kdeplot(data=featured_df, x=column, hue=target_df['NSP_Label'], fill=True,
+                palette=nsp_palette, ax=ax)
+
+    # Add intermittent red lines
+    if column in red_lines:
+        for line in red_lines[column]:
+            ax.axvline(line, color='red', linestyle='--', linewidth=1, label='Normal reference value')
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.set_title(f'Distribution of {description}', fontsize=18, fontweight='bold')
+
+    ax.get_legend().remove()
+
+
+def mark_value(ax, value):
+    """
+    Mark a value (e.g. the measurement of an exam) as a vertical line in the plot.
+    Returns the line so it can be moved to another value later.
+    """
+    return ax.axvline(value, color='black', linewidth=2, label='Exam value')
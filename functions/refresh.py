@@ -0,0 +1,200 @@
+import os
+import hashlib
+import threading
+import pandas as pd
+
+
+class FetchTimeout(Exception):
+    """The upstream fetch did not finish within the timeout."""
+
+
+class FetchBusy(Exception):
+    """An earlier fetch is still running."""
+
+
+def content_hash(featured_csv, target_csv):
+    """Hash of the csv content of both DataFrames, used as the version of the data."""
+    digest = hashlib.sha256()
+    digest.update(featured_csv.encode())
+    digest.update(target_csv.encode())
+    return digest.hexdigest()
+
+
+class DataRefresher:
+    """
+    Serve the local snapshot of the data right away and revalidate the upstream in a background thread.
+
+    Parameters:
+    fetcher: callable - Returns the upstream (featured_df, target_df). It should enforce the timeout itself,
+             a fetch which runs past the timeout keeps running in its thread.
+    data_dir: str - Directory of the local snapshot.
+    interval: float - Seconds between two revalidations.
+    timeout: float - Seconds to wait for the fetcher.
+    retry_delay: float - Seconds to wait after the first failed revalidation, doubled for every further failure.
+    max_retry_delay: float - Upper limit for the delay after failures.
+    """
+
+    def __init__(self, fetcher, data_dir='data', interval=3600, timeout=60, retry_delay=30, max_retry_delay=3600):
+        self.fetcher = fetcher
+        self.data_dir = data_dir
+        self.featured_path = os.path.join(data_dir, 'featured_df.csv')
+        self.target_path = os.path.join(data_dir, 'target_df.csv')
+        self.interval = interval
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()
+        self.fetch_thread = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.failures = 0
+
+        self.featured_df = None
+        self.target_df = None
+        self.version = None
+
+    def get(self):
+        """Return the current (featured_df, target_df, version). Loads the snapshot on the first call."""
+        with self.lock:
+            if self.version is None:
+                self.load_snapshot()
+            return self.featured_df, self.target_df, self.version
+
+    def load_snapshot(self):
+        """
+        Load the local snapshot. Only if there is none yet, the upstream is fetched synchronously.
+        Returns True if the upstream was fetched.
+        """
+        if os.path.exists(self.featured_path) and os.path.exists(self.target_path):
+            with open(self.featured_path) as featured_file, open(self.target_path) as target_file:
+                featured_csv = featured_file.read()
+                target_csv = target_file.read()
+            self.featured_df = pd.read_csv(self.featured_path)
+            self.target_df = pd.read_csv(self.target_path)
+            self.version = content_hash(featured_csv, target_csv)
+            return False
+
+        print("No local snapshot of the data, fetching it")
+        featured_df, target_df = self.fetch()
+        self.swap(featured_df, target_df)
+        return True
+
+    def revalidate(self):
+        """
+        Fetch the upstream once and swap in the new data if its content changed.
+        Returns True if a new version was swapped in. Errors and timeouts are raised.
+        """
+        with self.lock:
+            # The upstream was just fetched to create the snapshot, no need to fetch it again
+            if self.version is None and self.load_snapshot():
+                return True
+
+        featured_df, target_df = self.fetch()
+
+        with self.lock:
+            return self.swap(featured_df, target_df)
+
+    def fetch(self):
+        """
+        Call the fetcher in a separate thread and wait at most timeout seconds for the result.
+        No new fetch is started while an earlier one, which ran past the timeout, is still running.
+        """
+        result = {}
+
+        def run():
+            try:
+                result['value'] = self.fetcher()
+            except Exception as error:
+                result['error'] = error
+
+        with self.fetch_lock:
+            if self.fetch_thread is not None and self.fetch_thread.is_alive():
+                raise FetchBusy('An earlier fetch is still running')
+            thread = threading.Thread(target=run, name='DataRefresher-fetch', daemon=True)
+            self.fetch_thread = thread
+            thread.start()
+
+        thread.join(self.timeout)
+
+        if thread.is_alive():
+            raise FetchTimeout(f'Fetch did not finish within {self.timeout}s')
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    def wait_for_fetch(self, timeout=None):
+        """
+        Wait until a fetch which ran past the timeout has finished.
+        Returns False if it is still running after timeout seconds.
+        """
+        with self.fetch_lock:
+            thread = self.fetch_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def swap(self, featured_df, target_df):
+        """Write the data to the snapshot and serve it, unless its content hash did not change."""
+        featured_csv = featured_df.to_csv(index=False)
+        target_csv = target_df.to_csv(index=False)
+        version = content_hash(featured_csv, target_csv)
+
+        if version == self.version:
+            return False
+
+        # Write to temporary files first, so the snapshot is never half written
+        os.makedirs(self.data_dir, exist_ok=True)
+        for path, csv in [(self.featured_path, featured_csv), (self.target_path, target_csv)]:
+            with open(path + '.tmp', 'w') as snapshot_file:
+                snapshot_file.write(csv)
+            os.replace(path + '.tmp', path)
+
+        self.featured_df = featured_df
+        self.target_df = target_df
+        self.version = version
+        print(f"Serving new version of the data: {version[:12]}")
+        return True
+
+    def refresh_once(self):
+        """Revalidate once without raising. Returns True if a new version was swapped in."""
+        try:
+            changed = self.revalidate()
+        except Exception as error:
+            self.failures += 1
+            print(f"Revalidating the data failed ({self.failures}x in a row): {error!r}")
+            return False
+
+        self.failures = 0
+        return changed
+
+    def next_delay(self):
+        """Seconds until the next revalidation, backing off exponentially after failures."""
+        if self.failures == 0:
+            return self.interval
+        return min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures - 1))
+
+    def start(self):
+        """Start revalidating in a background thread. Calling it again does nothing."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name='DataRefresher', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the background thread and wait for it to finish."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        # Revalidate right away, the snapshot may be outdated
+        delay = 0
+        while not self.stop_event.wait(delay):
+            self.refresh_once()
+            delay = self.next_delay()
@@ -0,0 +1,228 @@
+# Import necessary libraries
+import os
+import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')  # Render without a display
+import matplotlib.pyplot as plt
+import pandas as pd
+import functions.helpers as helpers
+import functions.model as model
+import functions.plots as plots
+
+# Figure of the current worker process, created once by init_worker
+worker_state = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate a report (prediction and distribution plots) for every exam in a batch.')
+    parser.add_argument('--input', help='CSV file with one exam per row. Defaults to the records of the dataset itself.')
+    parser.add_argument('--output', default='reports', help='Directory for the reports (default: reports)')
+    parser.add_argument('--format', default='pdf', choices=['pdf', 'png'], help='File format of the reports (default: pdf)')
+    parser.add_argument('--id-column', default='exam_id', help='Column with the exam id. The row number is used if it is missing.')
+    parser.add_argument('--features', nargs='+', help='Measurements to plot (default: all)')
+    parser.add_argument('--batch-size', type=int, default=256, help='Number of exams scored at once (default: 256)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of processes rendering reports (default: number of CPUs)')
+    args = parser.parse_args()
+
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    return args
+
+
+def init_worker(featured_df, target_df, features):
+    """
+    Draw the distribution plots once per process. Every report only moves the exam markers
+    and changes the title, so the density estimation is not repeated for every exam.
+    """
+    n_cols = 2
+    n_rows = (len(features) + 1) // n_cols
+
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(18, n_rows * 6 + 2), constrained_layout=True, squeeze=False)
+
+    markers = {}
+    for i, column in enumerate(features):
+        ax = axes[i // n_cols, i % n_cols]
+        plots.plot_distribution(featured_df, target_df, column, ax)
+        line = plots.mark_value(ax, featured_df[column].iloc[0])
+        # Keep the limits of the first draw, moving the marker later does not update them
+        markers[column] = (line, ax, ax.get_xlim())
+
+    # Hide any unused subplots
+    for j in range(len(features), n_rows * n_cols):
+        fig.delaxes(axes.flatten()[j])
+
+    labels_order, handles = plots.legend_handles(exam_value=True)
+    fig.legend(handles=handles, labels=labels_order, loc='outside upper right', fontsize=14, title='NSP Label', title_fontsize='14')
+    title = fig.suptitle('', fontsize=22, fontweight='bold')
+    note = fig.supxlabel('', fontsize=14)
+
+    worker_state['fig'] = fig
+    worker_state['title'] = title
+    worker_state['note'] = note
+    worker_state['markers'] = markers
+
+
+def render_report(job):
+    """
+    Render the report of one exam and save it.
+    Returns None on success and the error message otherwise, so one bad exam does not stop the batch.
+    """
+    exam_id, values, imputed, prediction, probability, path, file_format = job
+    tmp_path = path + '.tmp'
+
+    try:
+        worker_state['title'].set_text(f'Exam {exam_id} - Prediction: {prediction} ({probability:.0%})')
+        if imputed:
+            worker_state['note'].set_text(f'Not measured, filled with the dataset mean for the prediction: {", ".join(imputed)}')
+        else:
+            worker_state['note'].set_text('')
+
+        for column, (line, ax, (lo, hi)) in worker_state['markers'].items():
+            value = values[column]
+
+            # Only mark values which were actually measured
+            if pd.isna(value):
+                line.set_visible(False)
+                ax.set_xlim(lo, hi)
+                continue
+
+            line.set_visible(True)
+            line.set_xdata([value, value])
+
+            # Widen the axis for values outside the distribution, these are the most important ones
+            padding = 0.05 * (max(hi, value) - min(lo, value))
+            ax.set_xlim(min(lo, value - padding), max(hi, value + padding))
+
+        # Write to a temporary file first, so an interrupted run never leaves a half written report
+        worker_state['fig'].savefig(tmp_path, format=file_format)
+        os.replace(tmp_path, path)
+
+    except Exception as error:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return f'{error!r}'
+
+    return None
+
+
+def report_paths(exams_df, output, file_format):
+    """
+    Path of the report for every exam. Exits if two exams would write the same report,
+    otherwise the reports would overwrite each other.
+    """
+    def report_path(exam_id):
+        # Only keep characters which are safe in a file name
+        safe_id = re.sub(r'[^A-Za-z0-9._-]', '_', str(exam_id))
+        return os.path.join(output, f'exam_{safe_id}.{file_format}')
+
+    paths = pd.Series([report_path(exam_id) for exam_id in exams_df.index], index=exams_df.index)
+    duplicated = paths[paths.duplicated(keep=False)]
+    if not duplicated.empty:
+        raise SystemExit(f"Exam ids are not unique (after replacing unsafe characters): {', '.join(str(exam_id) for exam_id in duplicated.index.unique())}")
+
+    return paths
+
+
+def pending_exams(exams_df, paths):
+    """Exams which do not have a report yet, so an interrupted run can be resumed."""
+    return exams_df[[not os.path.exists(path) for path in paths]]
+
+
+def build_jobs(batch_df, clf, featured_df, feature_columns, features, paths, file_format):
+    """
+    Score a batch of exams at once and create the render jobs.
+    Returns the jobs and a dictionary of exams which could not be scored, with the reason.
+    """
+    # Missing columns and empty cells are both missing measurements
+    raw_df = batch_df.reindex(columns=feature_columns)
+    measured_df = raw_df.apply(pd.to_numeric, errors='coerce')
+
+    # Values which are not numbers can not be scored, skip these exams
+    invalid_df = measured_df.isna() & raw_df.notna()
+    invalid = {exam_id: f'Not a number: {", ".join(row[row].index)}' for exam_id, row in invalid_df[invalid_df.any(axis=1)].iterrows()}
+    measured_df = measured_df[~invalid_df.any(axis=1)]
+
+    if measured_df.empty:
+        return [], invalid
+
+    imputed_df = measured_df.isna()
+    predictions = model.predict_batch(clf, model.prepare_input(measured_df, featured_df, feature_columns))
+
+    jobs = []
+    for (exam_id, values), (_, imputed), prediction, probability in zip(measured_df[features].iterrows(), imputed_df.iterrows(),
+                                                                        predictions['prediction'], predictions['probability']):
+        jobs.append((exam_id, values.to_dict(), imputed[imputed].index.tolist(), prediction, probability, paths[exam_id], file_format))
+
+    return jobs, invalid
+
+
+def main(args):
+    # Revalidate in the foreground, the worker processes must not be forked while a fetch is running
+    featured_df, target_df, version = helpers.loaddata(background=False)
+    if not helpers.refresher.wait_for_fetch(timeout=3 * helpers.refresher.timeout):
+        raise SystemExit("A fetch of the UCI repository is still running after it timed out, try again later")
+    print(f"Data version: {version[:12]}")
+    features = args.features or featured_df.columns.tolist()
+
+    unknown = [feature for feature in features if feature not in featured_df.columns]
+    if unknown:
+        raise SystemExit(f"Unknown features: {', '.join(unknown)}")
+
+    if args.input:
+        exams_df = pd.read_csv(args.input)
+    else:
+        exams_df = featured_df.copy()
+
+    if args.id_column in exams_df.columns:
+        exams_df = exams_df.set_index(args.id_column)
+
+    paths = report_paths(exams_df, args.output, args.format)
+    os.makedirs(args.output, exist_ok=True)
+
+    # Skip exams which already have a report
+    todo_df = pending_exams(exams_df, paths)
+    print(f"{len(exams_df) - len(todo_df)} of {len(exams_df)} reports already exist, {len(todo_df)} to go")
+
+    if todo_df.empty:
+        return
+
+    clf, feature_columns = model.train_model(featured_df, target_df)
+
+    start = time.perf_counter()
+    rendered = 0
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(featured_df, target_df, features)) as executor:
+        for batch_start in range(0, len(todo_df), args.batch_size):
+            batch_df = todo_df.iloc[batch_start:batch_start + args.batch_size]
+            jobs, invalid = build_jobs(batch_df, clf, featured_df, feature_columns, features, paths, args.format)
+
+            for exam_id, error in invalid.items():
+                failed += 1
+                print(f"Report for exam {exam_id} failed: {error}")
+
+            for job, error in zip(jobs, executor.map(render_report, jobs, chunksize=max(1, len(jobs) // (4 * args.workers)))):
+                if error is None:
+                    rendered += 1
+                else:
+                    failed += 1
+                    print(f"Report for exam {job[0]} failed: {error}")
+
+            elapsed = time.perf_counter() - start
+            print(f"{rendered}/{len(todo_df)} reports, {failed} failed, {rendered / elapsed:.2f} reports/s")
+
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {rendered} reports in {elapsed:.1f}s ({rendered / elapsed:.2f} reports/s), {failed} failed")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,198 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+import functions.helpers as helpers
+from functions.refresh import DataRefresher, FetchTimeout, FetchBusy
+
+
+class StandInFetcher:
+    """
+    Local stand-in for the UCI repository.
+
+    Modes:
+    ok: returns the data right away.
+    slow: returns the data after delay seconds.
+    failing: raises a ConnectionError.
+    Call change() to simulate a new version of the upstream data.
+    """
+
+    def __init__(self, mode='ok', delay=1.0):
+        self.mode = mode
+        self.delay = delay
+        self.baseline = 120
+        self.calls = 0
+
+    def change(self):
+        self.baseline += 1
+
+    def __call__(self):
+        self.calls += 1
+        if self.mode == 'failing':
+            raise ConnectionError('Error connecting to server')
+        if self.mode == 'slow':
+            time.sleep(self.delay)
+
+        featured_df = pd.DataFrame({'LB': [self.baseline, 132, 140], 'ASTV': [73, 17, 16]})
+        target_df = pd.DataFrame({'NSP': [2, 1, 1]})
+        return featured_df, target_df
+
+
+@pytest.fixture
+def fetcher():
+    return StandInFetcher()
+
+
+@pytest.fixture
+def refresher(fetcher, tmp_path):
+    return DataRefresher(fetcher, data_dir=str(tmp_path), interval=0.2, timeout=0.3, retry_delay=0.1, max_retry_delay=0.4)
+
+
+def test_first_load_fetches_and_writes_snapshot(refresher, tmp_path):
+    featured_df, target_df, version = refresher.get()
+
+    assert featured_df['LB'].tolist() == [120, 132, 140]
+    assert (tmp_path / 'featured_df.csv').exists()
+    assert (tmp_path / 'target_df.csv').exists()
+
+
+def test_cold_start_fetches_once(refresher, fetcher):
+    assert refresher.revalidate() is True
+    assert fetcher.calls == 1
+
+
+def test_snapshot_is_served_without_fetching(refresher, fetcher, tmp_path):
+    version = refresher.get()[2]
+
+    fetcher.mode = 'failing'
+    other = DataRefresher(fetcher, data_dir=str(tmp_path))
+
+    assert other.get()[2] == version
+    assert fetcher.calls == 1
+
+
+def test_same_content_is_not_swapped(refresher):
+    version = refresher.get()[2]
+
+    assert refresher.revalidate() is False
+    assert refresher.get()[2] == version
+
+
+def test_changed_content_is_swapped(refresher, fetcher):
+    version = refresher.get()[2]
+
+    fetcher.change()
+
+    assert refresher.revalidate() is True
+    featured_df, target_df, new_version = refresher.get()
+    assert new_version != version
+    assert featured_df['LB'].tolist() == [121, 132, 140]
+
+
+def test_slow_fetch_times_out(refresher, fetcher):
+    refresher.get()
+    fetcher.mode = 'slow'
+
+    with pytest.raises(FetchTimeout):
+        refresher.revalidate()
+
+
+def test_no_new_fetch_while_slow_fetch_is_running(refresher, fetcher):
+    refresher.get()
+    fetcher.mode = 'slow'
+
+    with pytest.raises(FetchTimeout):
+        refresher.revalidate()
+    with pytest.raises(FetchBusy):
+        refresher.revalidate()
+    assert fetcher.calls == 2
+
+    assert refresher.wait_for_fetch(timeout=0.01) is False
+    assert refresher.wait_for_fetch() is True
+    fetcher.mode = 'ok'
+    assert refresher.revalidate() is False
+
+
+def test_failures_back_off(refresher, fetcher):
+    refresher.get()
+    fetcher.mode = 'failing'
+
+    delays = []
+    for _ in range(4):
+        assert refresher.refresh_once() is False
+        delays.append(refresher.next_delay())
+
+    assert delays == [0.1, 0.2, 0.4, 0.4]
+    assert refresher.get()[0]['LB'][0] == 120
+
+    fetcher.mode = 'ok'
+    refresher.refresh_once()
+    assert refresher.next_delay() == 0.2
+
+
+def test_background_thread_swaps_in_changes(refresher, fetcher):
+    version = refresher.get()[2]
+    fetcher.change()
+
+    refresher.start()
+    try:
+        deadline = time.monotonic() + 5
+        while refresher.get()[2] == version and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        refresher.stop()
+
+    assert refresher.get()[0]['LB'][0] == 121
+
+
+class StandInUCIHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the UCI API, /slow sends the csv file byte by byte."""
+
+    csv = b'LB,ASTV,NSP\n120,73,2\n132,17,1\n'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        if self.path == '/api':
+            data_url = f'http://127.0.0.1:{self.server.server_port}/{"slow" if self.server.slow else "data"}.csv'
+            self.wfile.write(json.dumps({'status': 200, 'data': {'data_url': data_url, 'variables': [
+                {'name': 'LB', 'role': 'Feature'}, {'name': 'ASTV', 'role': 'Feature'}, {'name': 'NSP', 'role': 'Target'}]}}).encode())
+        elif self.path == '/data.csv':
+            self.wfile.write(self.csv)
+        else:
+            for byte in self.csv * 100:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.01)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def uci_server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInUCIHandler)
+    server.slow = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(helpers, 'UCI_API_URL', f'http://127.0.0.1:{server.server_port}/api')
+    yield server
+    server.shutdown()
+
+
+def test_fetch_uci_splits_features_and_targets(uci_server):
+    featured_df, target_df = helpers.fetch_uci()
+
+    assert featured_df.columns.tolist() == ['LB', 'ASTV']
+    assert target_df['NSP'].tolist() == [2, 1]
+
+
+def test_fetch_uci_stops_slow_downloads(uci_server, monkeypatch):
+    uci_server.slow = True
+    monkeypatch.setattr(helpers, 'FETCH_TIMEOUT', 0.5)
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        helpers.fetch_uci()
+    assert time.monotonic() - start < 2
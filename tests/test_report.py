@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import functions.model as model
+import report
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    n = 90
+    labels = np.repeat(['Normal', 'Suspect', 'Pathologic'], n // 3)
+    featured_df = pd.DataFrame({
+        'LB': rng.normal(130, 5, n) + np.repeat([0, 10, 20], n // 3),
+        'ASTV': rng.normal(40, 10, n),
+        'MSTV': rng.normal(1.5, 0.5, n),
+    })
+    target_df = pd.DataFrame({'NSP_Label': labels})
+    return featured_df, target_df
+
+
+@pytest.fixture
+def trained(dataset):
+    featured_df, target_df = dataset
+    return model.train_model(featured_df, target_df)
+
+
+def test_batch_predictions_match_single_predictions(dataset, trained):
+    featured_df, _ = dataset
+    clf, feature_columns = trained
+
+    predictions = model.predict_batch(clf, featured_df[feature_columns])
+
+    for i in range(len(featured_df)):
+        assert predictions['prediction'].iloc[i] == clf.predict(featured_df[feature_columns].iloc[[i]])[0]
+
+
+def test_imputed_features_are_reported(dataset, trained, tmp_path):
+    featured_df, _ = dataset
+    clf, feature_columns = trained
+    exams_df = pd.DataFrame({'LB': [130, 150], 'MSTV': [1.0, np.nan]}, index=['a', 'b'])
+    paths = report.report_paths(exams_df, str(tmp_path), 'png')
+
+    jobs, invalid = report.build_jobs(exams_df, clf, featured_df, feature_columns, feature_columns, paths, 'png')
+
+    assert invalid == {}
+    imputed = {job[0]: job[2] for job in jobs}
+    assert imputed == {'a': ['ASTV'], 'b': ['ASTV', 'MSTV']}
+    # Imputed values are not marked in the report
+    assert np.isnan(jobs[0][1]['ASTV'])
+
+
+def test_existing_reports_are_skipped(tmp_path):
+    exams_df = pd.DataFrame({'LB': [130, 140, 150]}, index=['a', 'b', 'c'])
+    paths = report.report_paths(exams_df, str(tmp_path), 'pdf')
+    (tmp_path / 'exam_b.pdf').write_text('done')
+
+    assert report.pending_exams(exams_df, paths).index.tolist() == ['a', 'c']
+
+
+def test_duplicate_exam_ids_are_rejected(tmp_path):
+    exams_df = pd.DataFrame({'LB': [130, 140]}, index=['a/b', 'a_b'])
+
+    with pytest.raises(SystemExit):
+        report.report_paths(exams_df, str(tmp_path), 'pdf')
+
+
+def test_bad_row_does_not_abort_the_batch(dataset, trained, tmp_path):
+    featured_df, target_df = dataset
+    clf, feature_columns = trained
+    exams_df = pd.DataFrame({'LB': [130, 140, 150], 'ASTV': ['40', 'bad', '55']}, index=['a', 'b', 'c'])
+    paths = report.report_paths(exams_df, str(tmp_path), 'png')
+
+    jobs, invalid = report.build_jobs(exams_df, clf, featured_df, feature_columns, feature_columns, paths, 'png')
+
+    assert list(invalid) == ['b']
+    assert [job[0] for job in jobs] == ['a', 'c']
+
+    # A report which can not be written returns the error instead of raising
+    report.init_worker(featured_df, target_df, feature_columns)
+    broken_job = jobs[0][:5] + (str(tmp_path / 'missing' / 'exam_a.png'),) + jobs[0][6:]
+    assert report.render_report(broken_job) is not None
+    assert report.render_report(jobs[1]) is None
+    assert (tmp_path / 'exam_c.png').exists()